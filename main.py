@@ -1,24 +1,58 @@
 #!/usr/bin/env python
 
+import asyncio
 import time
 import yaml
 import signal
-import requests
-import sys
+import aiohttp
+import orjson
+from aiohttp import web
 import os
 import redis
+import atexit
 import concurrent.futures
+import functools
+import itertools
+import logging
 
-from prometheus_client import start_http_server, Gauge, Counter
+from prometheus_client import Gauge, Counter, generate_latest, CONTENT_TYPE_LATEST
+
+logger = logging.getLogger(__name__)
+
+# Prefer the libyaml-backed loader, fall back to the pure-Python one if unavailable
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# Run the event loop on uvloop where it is installed, otherwise on the default asyncio loop
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 class GracefulKiller:
   kill_now = False
   def __init__(self):
-    signal.signal(signal.SIGINT, self.exit_gracefully)
-    signal.signal(signal.SIGTERM, self.exit_gracefully)
+    # Handlers run on the event loop, so setting the event wakes a pending wait immediately
+    self.event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGINT, self.exit_gracefully)
+    loop.add_signal_handler(signal.SIGTERM, self.exit_gracefully)
 
-  def exit_gracefully(self,signum, frame):
+  def exit_gracefully(self):
     self.kill_now = True
+    self.event.set()
+
+  async def wait(self, timeout):
+    """
+    Sleep for up to timeout seconds, returning True as soon as a shutdown signal arrives
+    """
+    try:
+      await asyncio.wait_for(self.event.wait(), timeout)
+    except asyncio.TimeoutError:
+      pass
+    return self.kill_now
 
 # Prometheus metrics for Solana RPC and wallets
 solana_health = Gauge("solana_health", "Solana node healthcheck", ["address", "server_group"])
@@ -26,7 +60,19 @@ solana_wallet_balance = Gauge("solana_wallet_balance", "Solana wallet balance",
 
 # Get Redis URL from environment variable
 REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
-r = redis.Redis.from_url(REDIS_URL)
+# Bounded pool shared by the Redis executor threads; callers wait for a free
+# connection instead of opening new ones under bursts
+redis_pool = redis.BlockingConnectionPool.from_url(
+    REDIS_URL,
+    max_connections=32,
+    health_check_interval=30,
+    socket_keepalive=True
+)
+r = redis.Redis(connection_pool=redis_pool)
+
+# Long-lived pool for blocking Redis calls, reused across poll cycles
+EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=16, thread_name_prefix='redis')
+atexit.register(EXECUTOR.shutdown, wait=False)
 
 neon_tx_success_ratio = Gauge(
     "neon_tx_success_ratio",
@@ -51,106 +97,206 @@ neon_proxy_block_lag = Gauge(
     ["neon_name", "solana_name", "chain"]
 )
 
-def exponential_backoff(base=5, factor=2, max_delay=300):
+# Redis cache for RPC results that change slowly (balances)
+BALANCE_CACHE_TTL = 30
+rpc_cache_hit = Counter("rpc_cache_hit", "RPC results served from the Redis cache", ["method"])
+rpc_cache_miss = Counter("rpc_cache_miss", "RPC results not found in the Redis cache", ["method"])
+balance_cache_hit = rpc_cache_hit.labels(method="getMultipleAccounts")
+balance_cache_miss = rpc_cache_miss.labels(method="getMultipleAccounts")
+
+# Label children resolved at runtime, keyed by (metric, label values)
+bound_metrics = {}
+
+def bound_metric(metric, *labelvalues):
+    """
+    Return the label child of metric, resolving .labels() only on first use
+    """
+    key = (metric, labelvalues)
+    child = bound_metrics.get(key)
+    if child is None:
+        child = bound_metrics[key] = metric.labels(*labelvalues)
+    return child
+
+# Seconds between polling cycles
+POLL_INTERVAL = 10
+# Port the Prometheus metrics endpoint listens on
+METRICS_PORT = 9000
+# Health, balance and block lag gauges are refreshed on scrape, at most once per
+# SCRAPE_REFRESH_TTL seconds; a scrape waits up to SCRAPE_REFRESH_TIMEOUT for it
+SCRAPE_REFRESH_TTL = 10
+SCRAPE_REFRESH_TIMEOUT = 8
+# Config file, re-read whenever its modification time changes
+CONFIG_PATH = "config.yaml"
+
+async def run_blocking(func, *args):
+    """
+    Run a blocking call on the shared executor without stalling the event loop
+    """
+    return await asyncio.get_running_loop().run_in_executor(EXECUTOR, func, *args)
+
+def create_session():
+    """
+    Create the shared aiohttp session used for all RPC calls
+    """
+    # Keep idle connections alive longer than the poll interval so every cycle
+    # reuses the pooled TCP/TLS connections instead of handshaking again, and cap
+    # connections per host so concurrent calls to a shared endpoint queue onto
+    # a few warm connections rather than opening a TLS session each
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=128, limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=60),
+        timeout=aiohttp.ClientTimeout(total=10, connect=3, sock_read=7)
+    )
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Retry policy for RPC calls: connection failures, timeouts and gateway errors
+RPC_RETRIES = 2
+RPC_BACKOFF = 0.3
+RPC_RETRY_STATUSES = {502, 503, 504}
+# Maximum number of requests sent in one JSON-RPC batch
+RPC_BATCH_SIZE = 20
+# Maximum number of accounts per getMultipleAccounts call
+MULTIPLE_ACCOUNTS_LIMIT = 100
+
+async def rpc(session, url, request):
+    """
+    Send a JSON-RPC request (or batch) encoded and decoded with orjson,
+    retrying transient failures with exponential backoff; request may be pre-encoded bytes.
+    Raises with the HTTP status when the response is not a JSON-RPC payload
+    """
+    body = request if isinstance(request, bytes) else orjson.dumps(request)
+    for attempt in range(RPC_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(RPC_BACKOFF * 2 ** (attempt - 1))
+        try:
+            async with session.post(url, data=body, headers=JSON_HEADERS) as resp:
+                if resp.status in RPC_RETRY_STATUSES and attempt < RPC_RETRIES:
+                    continue
+                payload = await resp.read()
+                try:
+                    data = orjson.loads(payload)
+                except orjson.JSONDecodeError:
+                    data = None
+                # Nodes may return a JSON-RPC error object with an error status; anything else
+                # (rate limit or proxy error pages) is reported with its HTTP status
+                if isinstance(data, list) or (isinstance(data, dict) and (resp.status < 400 or "jsonrpc" in data)):
+                    return data
+                raise Exception(f"HTTP {resp.status} from {url}: {payload[:200].decode(errors='replace')}")
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt == RPC_RETRIES:
+                raise
+
+def chunked(items, size):
+    """
+    Split an iterable into lists of at most size items
+    """
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+async def rpc_batch(session, url, requests):
     """
-    Generator for exponential backoff delays
+    Send JSON-RPC requests as a single batch and return responses keyed by id
     """
-    delay = base
-    while True:
-        yield delay
-        delay = min(delay * factor, max_delay)
+    data = await rpc(session, url, requests)
+    if not isinstance(data, list):
+        raise Exception(f"unexpected batch response: {data}")
+    return {item.get("id"): item for item in data}
 
-def get_neon_transactions(limit=15):
+async def cache_get(redis_conn, keys):
     """
-    Get recent Neon EVM transactions from Solana by program id
+    Read cached values, treating a Redis failure as a miss for every key
     """
     try:
-        req = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "getSignaturesForAddress",
-            "params": [NEON_PROGRAM_ID_MAINNET , {"limit": limit}]
-        }
-        resp = requests.post(SOLANA_RPC, json=req, timeout=10)
-        resp.raise_for_status()
-        return resp.json().get('result', [])
+        return await run_blocking(redis_conn.mget, keys)
     except Exception as e:
-        print(f'get_neon_transactions error: {e}')
-        return []
+        logger.warning('cache read error: %s', e)
+        return [None] * len(keys)
 
-def check_transaction(signature):
+async def cache_set(redis_conn, items, ttl):
     """
-    Check if transaction is successful and get its blockTime
+    Write (key, value) pairs to the cache with a TTL in one pipelined round-trip
     """
     try:
-        req = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "getTransaction",
-            "params": [signature, {"encoding": "json"}]
-        }
-        resp = requests.post(SOLANA_RPC, json=req, timeout=10)
-        resp.raise_for_status()
-        tx = resp.json().get('result', None)
-        if not tx:
-            return None, None
-        block_time = tx.get('blockTime', None)
-        success = tx['meta']['err'] is None
-        return success, block_time
+        pipe = redis_conn.pipeline(transaction=False)
+        for key, value in items:
+            pipe.setex(key, ttl, value)
+        await run_blocking(pipe.execute)
     except Exception as e:
-        print(f'check_transaction error: {e}')
-        return None, None
+        logger.warning('cache write error: %s', e)
 
-def export_neon_metrics():
+async def check_transactions(session, url, signatures):
     """
-    Export Neon EVM transaction metrics to Prometheus, using Redis for state
+    Check if transactions are successful and get their blockTime using batched getTransaction calls
+    of up to RPC_BATCH_SIZE requests each; a transaction the node returned no result for maps to
+    (None, None), and signatures whose request failed are left out
     """
-    backoff = exponential_backoff()
-    while True:
+    statuses = {}
+
+    async def fetch_statuses(chunk):
+        try:
+            # Only meta.err and blockTime are read. base64 encoding returns the transaction body as one
+            # opaque string instead of a nested instruction tree, which keeps decoding cheap, and
+            # maxSupportedTransactionVersion lets versioned (v0) transactions resolve instead of erroring
+            requests = [
+                {
+                    "jsonrpc": "2.0",
+                    "id": i,
+                    "method": "getTransaction",
+                    "params": [sig, {"encoding": "base64", "maxSupportedTransactionVersion": 0}]
+                }
+                for i, sig in enumerate(chunk)
+            ]
+            responses = await rpc_batch(session, url, requests)
+        except Exception as e:
+            logger.warning('check_transactions error: %s', e)
+            return []
+        return [(sig, responses[i]) for i, sig in enumerate(chunk) if i in responses]
+
+    batches = await asyncio.gather(*[fetch_statuses(chunk) for chunk in chunked(signatures, RPC_BATCH_SIZE)])
+    for sig, resp in itertools.chain.from_iterable(batches):
+        if "error" in resp:
+            logger.warning('getTransaction error for %s: %s', sig, resp["error"].get("message"))
+            continue
+        statuses[sig] = (None, None)
+        tx = resp.get('result', None)
+        if not tx:
+            continue
         try:
-            txs = get_neon_transactions()
-            print(f"[DEBUG] txs: {txs}", flush=True)
-            new_sigs = []
-            sig_blocktime_map = {}
-            if txs:
-                for tx in txs:
-                    sig = tx['signature']
-                    block_time = tx.get('blockTime')
-                    sig_blocktime_map[sig] = block_time
-                    if not r.sismember('neon_signatures', sig):
-                        new_sigs.append(sig)
-                if new_sigs:
-                    total = len(new_sigs)
-                    success_count = 0
-                    fail_count = 0
-                    for sig in new_sigs:
-                        success, block_time = check_transaction(sig)
-                        if success is None or block_time is None:
-                            continue
-                        submit_time = sig_blocktime_map.get(sig)
-                        if submit_time and block_time:
-                            if success:
-                                success_count += 1
-                            else:
-                                fail_count += 1
-                                r.sadd('neon_failed_signatures', sig)  # Save failed tx signature
-                            r.sadd('neon_signatures', sig)
-                    # Update metrics after counting
-                    neon_tx_count.labels(chain=None, program_id=None, solana_url=None).inc(success_count + fail_count)
-                    neon_tx_fail_count.labels(chain=None, program_id=None, solana_url=None).inc(fail_count)
-                    if total > 0:
-                        neon_tx_success_ratio.labels(chain=None, program_id=None, solana_url=None).set(success_count / total)
-            # Update timestamp at the end of each successful cycle
-            neon_exporter_last_update_timestamp.set(time.time())
-            time.sleep(30)
-            backoff = exponential_backoff()  # reset backoff on success
+            statuses[sig] = (tx['meta']['err'] is None, tx.get('blockTime', None))
         except Exception as e:
-            print('export_neon_metrics error:', e)
-            time.sleep(next(backoff))
+            logger.warning('check_transactions error for %s: %s', sig, e)
+    return statuses
+
+# Number of most recent signatures kept per network for deduplication; older
+# entries are trimmed by blockTime so the Redis state stays bounded
+SIGNATURE_HISTORY = 10000
+
+# getSignaturesForAddress paging: the first poll of a network only fetches the latest
+# window, later polls page back to the stored cursor, bounded to SIGNATURE_MAX_PAGES pages
+SIGNATURE_WINDOW = 15
+SIGNATURE_PAGE_LIMIT = 1000
+SIGNATURE_MAX_PAGES = 5
+# Number of polls a signature whose getTransaction returns no result is tried on
+# before it is dropped from the pending retries; failed requests do not count
+SIGNATURE_MAX_ATTEMPTS = 5
+
+# Local mirror of the processed signature sets, keyed by Redis key, so signatures
+# already seen by this process are filtered without a Redis round-trip. Dicts
+# keep insertion order, so the oldest entries are dropped first when trimming.
+seen_signatures = {}
+
+def trim_seen(seen):
+    """
+    Drop the oldest entries of a local signature mirror beyond SIGNATURE_HISTORY
+    """
+    while len(seen) > SIGNATURE_HISTORY:
+        del seen[next(iter(seen))]
 
 def restore_counters(solana_services, redis_conn):
     """
-    Restore Prometheus counters from Redis state for all monitored networks on exporter startup
+    Restore Prometheus counters and the local signature mirror from Redis state for monitored networks,
+    on exporter startup and for label sets added by a config reload
     """
     for solana in solana_services:
         chain = solana.get("chain")
@@ -158,239 +304,570 @@ def restore_counters(solana_services, redis_conn):
         solana_url = solana.get("url")
         if not (chain and program_id and solana_url):
             continue
-        redis_key = f"neon_signatures_{chain}_{program_id}"
-        redis_fail_key = f"neon_failed_signatures_{chain}_{program_id}"
-        processed_count = redis_conn.scard(redis_key)
-        failed_count = redis_conn.scard(redis_fail_key)
+        redis_key = f"neon_sig_zset_{chain}_{program_id}"
+        count_key = f"neon_tx_count_{chain}_{program_id}"
+        fail_count_key = f"neon_tx_fail_count_{chain}_{program_id}"
+        # Seed the persisted totals from the legacy unbounded sets on first start after upgrade
+        if not redis_conn.exists(count_key):
+            redis_conn.set(count_key, redis_conn.scard(f"neon_signatures_{chain}_{program_id}"), nx=True)
+            redis_conn.set(fail_count_key, redis_conn.scard(f"neon_failed_signatures_{chain}_{program_id}"), nx=True)
+        # A network that only changed its URL on reload keeps the mirror it already has
+        if redis_key not in seen_signatures:
+            seen_signatures[redis_key] = dict.fromkeys(sig.decode() for sig in redis_conn.zrange(redis_key, 0, -1))
+        processed_count = int(redis_conn.get(count_key) or 0)
+        failed_count = int(redis_conn.get(fail_count_key) or 0)
         if processed_count > 0:
             neon_tx_count.labels(chain=chain, program_id=program_id, solana_url=solana_url).inc(processed_count)
         if failed_count > 0:
             neon_tx_fail_count.labels(chain=chain, program_id=program_id, solana_url=solana_url).inc(failed_count)
 
-def healthcheck(server: str):
+# getHealth takes no parameters, so its request body is encoded once
+HEALTH_BODY = orjson.dumps({"jsonrpc": "2.0", "id": 1, "method": "getHealth"})
+
+async def healthcheck(session, server: str):
     """
     Check Solana node health using getHealth RPC method
     """
     try:
-        request = {"jsonrpc": "2.0", "id": 1, "method": "getHealth"}
-        response = requests.post(server, json=request, timeout=10)
-        resp_json = response.json()
+        resp_json = await rpc(session, server, HEALTH_BODY)
         if "result" in resp_json and resp_json["result"] == "ok":
             return 1
         elif "error" in resp_json:
             data = resp_json["error"].get("data", {})
             if isinstance(data, dict) and "numSlotsBehind" in data:
-                print(resp_json["error"]["message"])
+                logger.warning("%s: %s", server, resp_json["error"]["message"])
                 return data["numSlotsBehind"]
             else:
-                print(resp_json["error"]["message"])
+                logger.warning("%s: %s", server, resp_json["error"]["message"])
                 return -1
         else:
             return -1
     except Exception as e:
-        print(f'healthcheck error: {e}')
+        logger.warning('healthcheck error for %s: %s', server, e)
         return -1
 
-def check_balance(wallet: dict, solana_services: list):
+async def check_balances(session, wallets: list, services_by_chain: dict, redis_conn):
     """
-    Get Solana wallet balance using getBalance RPC method, picking endpoint by chain
+    Get Solana wallet balances with getMultipleAccounts, one request per endpoint picked by chain,
+    caching results in Redis for BALANCE_CACHE_TTL seconds; balances are keyed by (wallet, chain)
     """
-    wallet_value = wallet.get("value")
-    wallet_chain = wallet.get("chain")
-    if not wallet_value or not wallet_chain:
-        print(f"Invalid wallet entry: {wallet}")
-        return 0
-    # Find matching endpoint by chain
-    solana = next((s for s in solana_services if s.get("chain") == wallet_chain and s.get("url")), None)
-    if not solana:
-        print(f"No solana_service for chain {wallet_chain} for wallet {wallet_value}")
-        return 0
-    solana_url = solana.get("url")
-    try:
-        request = {"jsonrpc": "2.0", "id": 1, "method": "getBalance", "params": [wallet_value]}
-        response = requests.post(solana_url, json=request, timeout=10)
-        return int(response.json()["result"]["value"]) / 1000000000
-    except Exception as e:
-        print(f'check_balance error for {wallet_value} on {solana_url}: {e}')
-        return 0
+    balances = {}
+    candidates = []
+    for wallet in wallets:
+        wallet_value = wallet.get("value")
+        wallet_chain = wallet.get("chain")
+        if not wallet_value or not wallet_chain:
+            logger.warning("Invalid wallet entry: %s", wallet)
+            continue
+        # Find matching endpoint by chain
+        solana = services_by_chain.get(wallet_chain)
+        if not solana:
+            logger.warning("No solana_service for chain %s for wallet %s", wallet_chain, wallet_value)
+            balances[(wallet_value, wallet_chain)] = 0
+            continue
+        candidates.append(((wallet_value, wallet_chain), solana.get("url"), f"balance_cache_{wallet_chain}_{wallet_value}"))
+    if not candidates:
+        return balances
+
+    wallets_by_url = {}
+    cached = await cache_get(redis_conn, [cache_key for _, _, cache_key in candidates])
+    for (wallet_key, solana_url, cache_key), value in zip(candidates, cached):
+        if value is None:
+            wallets_by_url.setdefault(solana_url, []).append((wallet_key, cache_key))
+        else:
+            balances[wallet_key] = float(value)
+    misses = sum(len(values) for values in wallets_by_url.values())
+    balance_cache_hit.inc(len(candidates) - misses)
+    balance_cache_miss.inc(misses)
+
+    async def fetch_balances(solana_url, wallet_keys):
+        # getMultipleAccounts returns lamports for up to MULTIPLE_ACCOUNTS_LIMIT accounts per call;
+        # a zero-length dataSlice drops the account data we don't need from the response
+        chunks = list(chunked(wallet_keys, MULTIPLE_ACCOUNTS_LIMIT))
+        try:
+            requests = [
+                {
+                    "jsonrpc": "2.0",
+                    "id": i,
+                    "method": "getMultipleAccounts",
+                    "params": [
+                        [wallet_value for (wallet_value, _), _ in chunk],
+                        {"encoding": "base64", "dataSlice": {"offset": 0, "length": 0}}
+                    ]
+                }
+                for i, chunk in enumerate(chunks)
+            ]
+            responses = await rpc_batch(session, solana_url, requests)
+        except Exception as e:
+            logger.warning('check_balances error on %s: %s', solana_url, e)
+            return {}
+        result = {}
+        for i, chunk in enumerate(chunks):
+            try:
+                accounts = responses[i]["result"]["value"]
+            except Exception as e:
+                logger.warning('check_balances error on %s: %s', solana_url, responses.get(i, {}).get("error", e))
+                continue
+            for (wallet_key, cache_key), account in zip(chunk, accounts):
+                # Accounts that do not exist are returned as null and hold no lamports
+                result[(wallet_key, cache_key)] = (account["lamports"] if account else 0) / 1000000000
+        return result
+
+    fresh = []
+    for result in await asyncio.gather(*[fetch_balances(url, values) for url, values in wallets_by_url.items()]):
+        for (wallet_key, cache_key), balance in result.items():
+            balances[wallet_key] = balance
+            fresh.append((cache_key, balance))
+    if fresh:
+        await cache_set(redis_conn, fresh, BALANCE_CACHE_TTL)
+    for values in wallets_by_url.values():
+        for wallet_key, _ in values:
+            balances.setdefault(wallet_key, 0)
+    return balances
+
+# Block number calls used for lag checks: params and result parser per method
+BLOCK_NUMBER_METHODS = {
+    # Neon Proxy: result is hex string, e.g. '0x1a2b3c'
+    "eth_blockNumber": ([], lambda result: int(result, 16)),
+    # Solana RPC: current confirmed slot
+    "getSlot": ([{"commitment": "confirmed"}], int),
+}
 
-def get_neon_block_number(neon_url):
+@functools.lru_cache(maxsize=None)
+def block_numbers_body(methods):
     """
-    Get current block number from Neon Proxy using eth_blockNumber RPC method
+    Encode the batch body for a tuple of block number methods once per combination
     """
-    try:
-        req = {
+    return orjson.dumps([
+        {
             "jsonrpc": "2.0",
-            "id": 1,
-            "method": "eth_blockNumber",
-            "params": []
+            "id": i,
+            "method": method,
+            "params": BLOCK_NUMBER_METHODS[method][0]
         }
-        resp = requests.post(neon_url, json=req, timeout=10)
-        result = resp.json()["result"]
-        # result is hex string, e.g. '0x1a2b3c'
-        return int(result, 16)
-    except Exception as e:
-        print(f"get_neon_block_number error: {e}")
-        return None
+        for i, method in enumerate(methods)
+    ])
 
-def get_solana_block_number(solana_url):
+async def get_block_numbers(session, url, methods):
     """
-    Get current confirmed slot from Solana RPC using getSlot method
+    Get current block numbers from one endpoint, sending all requested methods in a single batch
     """
     try:
-        req = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "getSlot",
-            "params": [{"commitment": "confirmed"}]
-        }
-        resp = requests.post(solana_url, json=req, timeout=10)
-        return int(resp.json()["result"])
+        responses = await rpc_batch(session, url, block_numbers_body(tuple(methods)))
     except Exception as e:
-        print(f"get_solana_block_number error: {e}")
-        return None
+        logger.warning("get_block_numbers error for %s: %s", url, e)
+        return {}
+    blocks = {}
+    for i, method in enumerate(methods):
+        try:
+            blocks[method] = BLOCK_NUMBER_METHODS[method][1](responses[i]["result"])
+        except Exception as e:
+            logger.warning("%s error for %s: %s", method, url, responses.get(i, {}).get("error", e))
+    return blocks
 
-def healthcheck_block_lag(neon_services, solana_services):
+def block_lag_pairs(neon_services, services_by_chain):
     """
-    Check block lag between Neon Proxy and Solana RPC endpoints
+    Pair each Neon Proxy with the Solana RPC endpoint of its chain
     """
-    # Collect all needed pairs (neon, solana) by chain
     pairs = []
     for neon in neon_services:
         neon_chain = neon.get("chain")
         neon_name = neon.get("name")
         neon_url = neon.get("url")
         if not (neon_chain and neon_name and neon_url):
-            print(f"Invalid neon_service entry: {neon}")
+            logger.warning("Invalid neon_service entry: %s", neon)
             continue
-        solana = next((s for s in solana_services if s.get("chain") == neon_chain and s.get("url") and s.get("name")), None)
-        if not solana:
-            print(f"No solana_service for chain {neon_chain}. solana_services: {solana_services}")
+        solana = services_by_chain.get(neon_chain)
+        if not (solana and solana.get("name")):
+            logger.warning("No named solana_service for chain %s", neon_chain)
             continue
         solana_name = solana.get("name")
         solana_url = solana.get("url")
         pairs.append((neon_name, neon_url, solana_name, solana_url, neon_chain))
+    return pairs
+
+async def healthcheck_block_lag(session, neon_services, services_by_chain):
+    """
+    Check block lag between Neon Proxy and Solana RPC endpoints
+    """
+    pairs = block_lag_pairs(neon_services, services_by_chain)
 
-    def fetch_blocks(neon_url, solana_url):
-        neon_block = get_neon_block_number(neon_url)
-        solana_block = get_solana_block_number(solana_url)
-        return neon_block, solana_block
+    # One batched request per distinct endpoint, carrying every block number call it serves
+    methods_by_url = {}
+    for (_, neon_url, _, solana_url, _) in pairs:
+        methods_by_url.setdefault(neon_url, {})["eth_blockNumber"] = None
+        methods_by_url.setdefault(solana_url, {})["getSlot"] = None
+    urls = list(methods_by_url)
+    results = await asyncio.gather(*[get_block_numbers(session, url, list(methods_by_url[url])) for url in urls])
+    blocks_by_url = dict(zip(urls, results))
+    for (neon_name, neon_url, solana_name, solana_url, chain) in pairs:
+        neon_block = blocks_by_url[neon_url].get("eth_blockNumber")
+        solana_block = blocks_by_url[solana_url].get("getSlot")
+        if neon_block is not None and solana_block is not None:
+            lag = solana_block - neon_block
+            logger.debug("neon_name=%s, solana_name=%s, chain=%s, neon_block=%s, solana_block=%s, lag=%s", neon_name, solana_name, chain, neon_block, solana_block, lag)
+            bound_metric(neon_proxy_block_lag, neon_name, solana_name, chain).set(lag)
+        else:
+            logger.warning("Block number unavailable for %s or %s", neon_name, solana_name)
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
-        future_to_pair = {
-            executor.submit(fetch_blocks, neon_url, solana_url): (neon_name, solana_name, chain)
-            for (neon_name, neon_url, solana_name, solana_url, chain) in pairs
+async def get_new_signatures(session, url, program_id, until):
+    """
+    Fetch signatures for a program newer than the until cursor, newest first, following
+    before pages up to SIGNATURE_MAX_PAGES; without a cursor only the latest window is fetched
+    """
+    if until is None:
+        config = {"limit": SIGNATURE_WINDOW}
+    else:
+        config = {"limit": SIGNATURE_PAGE_LIMIT, "until": until}
+    signatures = []
+    for _ in range(SIGNATURE_MAX_PAGES):
+        req = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getSignaturesForAddress",
+            "params": [program_id, config]
         }
-        for future in concurrent.futures.as_completed(future_to_pair):
-            neon_name, solana_name, chain = future_to_pair[future]
-            try:
-                neon_block, solana_block = future.result()
-                if neon_block is not None and solana_block is not None:
-                    lag = solana_block - neon_block
-                    print(f"[DEBUG] neon_name={neon_name}, solana_name={solana_name}, chain={chain}, neon_block={neon_block}, solana_block={solana_block}, lag={lag}", flush=True)
-                    neon_proxy_block_lag.labels(
-                        neon_name=neon_name,
-                        solana_name=solana_name,
-                        chain=chain
-                    ).set(lag)
-                else:
-                    print(f"Block number unavailable for {neon_name} or {solana_name}")
-            except Exception as e:
-                print(f"Exception in block lag check for {neon_name}/{solana_name}: {e}")
+        data = await rpc(session, url, req)
+        if "error" in data:
+            raise Exception(data["error"].get("message"))
+        page = data.get("result", [])
+        signatures.extend(tx["signature"] for tx in page)
+        if until is None or len(page) < SIGNATURE_PAGE_LIMIT:
+            return signatures
+        config = {**config, "before": page[-1]["signature"]}
+    logger.warning("Signature backlog for %s since %s exceeds %d, older ones skipped",
+                   program_id, until, len(signatures))
+    return signatures
 
-def monitor_neon_transactions(solana_services, redis_conn):
+async def monitor_neon_service(session, solana, redis_conn, tx_children):
     """
-    Monitor Neon EVM transactions for all configured networks
+    Monitor Neon EVM transactions for a single configured network, returning whether
+    signatures were fetched and every transaction request succeeded
     """
-    for solana in solana_services:
-        chain = solana.get("chain")
-        program_id = solana.get("program_id")
-        solana_url = solana.get("url")
-        if not (chain and program_id and solana_url):
-            print(f"Invalid solana_service entry: {solana}")
-            continue
-        redis_key = f"neon_signatures_{chain}_{program_id}"
-        redis_fail_key = f"neon_failed_signatures_{chain}_{program_id}"
-        signatures = []
-        try:
-            req = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "getSignaturesForAddress",
-                "params": [program_id, {"limit": 15}]
-            }
-            resp = requests.post(solana_url, json=req, timeout=10)
-            result = resp.json().get("result", [])
-            signatures = [tx["signature"] for tx in result]
-        except Exception as e:
-            print(f"getSignaturesForAddress error for {chain}: {e}")
-            continue
-        new_sigs = [sig for sig in signatures if not redis_conn.sismember(redis_key, sig)]
-        if not new_sigs:
+    chain = solana.get("chain")
+    program_id = solana.get("program_id")
+    solana_url = solana.get("url")
+    if not (chain and program_id and solana_url):
+        logger.warning("Invalid solana_service entry: %s", solana)
+        return False
+    tx_count, tx_fail_count, tx_success_ratio = tx_children[(chain, program_id, solana_url)]
+    redis_key = f"neon_sig_zset_{chain}_{program_id}"
+    redis_fail_key = f"neon_failed_sig_zset_{chain}_{program_id}"
+    count_key = f"neon_tx_count_{chain}_{program_id}"
+    fail_count_key = f"neon_tx_fail_count_{chain}_{program_id}"
+    cursor_key = f"neon_last_seen_{chain}_{program_id}"
+    pending_key = f"neon_pending_signatures_{chain}_{program_id}"
+    try:
+        pipe = redis_conn.pipeline(transaction=False)
+        pipe.get(cursor_key)
+        pipe.hgetall(pending_key)
+        last_seen, pending = await run_blocking(pipe.execute)
+        until = last_seen.decode() if last_seen else None
+        signatures = await get_new_signatures(session, solana_url, program_id, until)
+    except Exception as e:
+        logger.warning("getSignaturesForAddress error for %s: %s", chain, e)
+        return False
+    logger.debug("chain=%s, program_id=%s, until=%s, signatures=%s", chain, program_id, until, signatures)
+    # Unresolved signatures from earlier polls, with the number of attempts made so far
+    pending = {sig.decode(): int(attempts) for sig, attempts in pending.items()}
+    if not (signatures or pending):
+        return True
+    seen = seen_signatures.setdefault(redis_key, {})
+    candidates = [sig for sig in signatures if sig not in seen and sig not in pending]
+    candidates.extend(sig for sig in pending if sig not in seen)
+    new_sigs = []
+    if candidates:
+        # Confirm against Redis in case another exporter sharing it recorded them already
+        scores = await run_blocking(redis_conn.zmscore, redis_key, candidates)
+        for sig, score in zip(candidates, scores):
+            if score is not None:
+                seen[sig] = None
+            else:
+                new_sigs.append(sig)
+    if until is None and new_sigs:
+        # First poll without a cursor, e.g. right after upgrading from the unbounded legacy sets:
+        # their signatures are already part of the totals seeded by restore_counters
+        members = await run_blocking(redis_conn.smismember, f"neon_signatures_{chain}_{program_id}", new_sigs)
+        for sig, member in zip(new_sigs, members):
+            if member:
+                seen[sig] = None
+        new_sigs = [sig for sig, member in zip(new_sigs, members) if not member]
+    success_count = 0
+    fail_count = 0
+    processed_sigs = []
+    statuses = await check_transactions(session, solana_url, new_sigs)
+    pipe = redis_conn.pipeline(transaction=False)
+    for sig in new_sigs:
+        success, block_time = statuses.get(sig, (None, None))
+        if success is None:
             continue
-        success_count = 0
-        fail_count = 0
-        for sig in new_sigs:
+        if success:
+            success_count += 1
+        else:
+            fail_count += 1
+            pipe.zadd(redis_fail_key, {sig: block_time or 0})
+        pipe.zadd(redis_key, {sig: block_time or 0})
+        processed_sigs.append(sig)
+    if processed_sigs:
+        # Keep only the newest SIGNATURE_HISTORY entries; totals live in the count keys
+        pipe.zremrangebyrank(redis_key, 0, -(SIGNATURE_HISTORY + 1))
+        pipe.zremrangebyrank(redis_fail_key, 0, -(SIGNATURE_HISTORY + 1))
+        pipe.incrby(count_key, success_count + fail_count)
+        pipe.incrby(fail_count_key, fail_count)
+    # The cursor always moves to the newest signature; unresolved ones are retried from
+    # the pending hash until they resolve or the node keeps returning no result for them
+    retry = {}
+    for sig in new_sigs:
+        if sig not in statuses:
+            # The request itself failed, which says nothing about the transaction
+            retry[sig] = pending.get(sig, 0)
+        elif statuses[sig][0] is None:
+            attempts = pending.get(sig, 0) + 1
+            if attempts < SIGNATURE_MAX_ATTEMPTS:
+                retry[sig] = attempts
+            else:
+                logger.warning("Giving up on transaction %s for %s after %d attempts", sig, chain, attempts)
+    done = [sig for sig in pending if sig not in retry]
+    if done:
+        pipe.hdel(pending_key, *done)
+    if retry:
+        pipe.hset(pending_key, mapping=retry)
+    if signatures:
+        pipe.set(cursor_key, signatures[0])
+    await run_blocking(pipe.execute)
+    seen.update(dict.fromkeys(processed_sigs))
+    trim_seen(seen)
+    tx_count.inc(success_count + fail_count)
+    tx_fail_count.inc(fail_count)
+    total = success_count + fail_count
+    if total > 0:
+        tx_success_ratio.set(success_count / total)
+    return len(statuses) == len(new_sigs)
+
+async def monitor_neon_transactions(session, solana_services, redis_conn, tx_children):
+    """
+    Monitor Neon EVM transactions for all configured networks concurrently; entries sharing
+    a chain and program_id share their Redis state, so those are polled one after another.
+    Returns whether monitoring succeeded for every entry
+    """
+    networks = {}
+    for solana in solana_services:
+        networks.setdefault((solana.get("chain"), solana.get("program_id")), []).append(solana)
+
+    async def monitor_network(services):
+        ok = True
+        for solana in services:
             try:
-                req = {
-                    "jsonrpc": "2.0",
-                    "id": 1,
-                    "method": "getTransaction",
-                    "params": [sig, {"encoding": "json"}]
-                }
-                resp = requests.post(solana_url, json=req, timeout=10)
-                tx = resp.json().get("result", None)
-                if not tx:
-                    continue
-                success = tx["meta"]["err"] is None
-                if success:
-                    success_count += 1
-                else:
-                    fail_count += 1
-                    redis_conn.sadd(redis_fail_key, sig)
-                redis_conn.sadd(redis_key, sig)
+                ok = await monitor_neon_service(session, solana, redis_conn, tx_children) and ok
             except Exception as e:
-                print(f"getTransaction error for {chain}: {e}")
-        neon_tx_count.labels(chain=chain, program_id=program_id, solana_url=solana_url).inc(success_count + fail_count)
-        neon_tx_fail_count.labels(chain=chain, program_id=program_id, solana_url=solana_url).inc(fail_count)
-        total = success_count + fail_count
-        if total > 0:
-            neon_tx_success_ratio.labels(chain=chain, program_id=program_id, solana_url=solana_url).set(success_count / total)
-
-def main():
+                logger.error("Neon transaction monitoring error for %s: %s", solana.get('chain'), e)
+                ok = False
+        return ok
+
+    return all(await asyncio.gather(*[monitor_network(services) for services in networks.values()]))
+
+class LazyRefresher:
+  """
+  Run a refresh coroutine on demand, at most once per ttl seconds
+  """
+  def __init__(self, refresh, ttl):
+    self.refresh = refresh
+    self.ttl = ttl
+    self.last_refresh = None
+    self.lock = asyncio.Lock()
+
+  async def ensure_fresh(self):
+    async with self.lock:
+      if self.last_refresh is not None and time.monotonic() - self.last_refresh < self.ttl:
+        return
+      await self.refresh()
+      self.last_refresh = time.monotonic()
+
+async def metrics_handler(request):
+    refresher = request.app["refresher"]
+    if refresher is not None:
+        try:
+            # Shielded so a slow refresh keeps running for the next scrape while this one gets current values
+            await asyncio.wait_for(asyncio.shield(refresher.ensure_fresh()), SCRAPE_REFRESH_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("Metrics refresh is taking longer than %ss, serving previous values", SCRAPE_REFRESH_TIMEOUT)
+        except Exception as e:
+            logger.error("Metrics refresh error: %s", e)
+    return web.Response(body=generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+async def start_metrics_server(port, refresher=None):
+    """
+    Serve Prometheus metrics from the running event loop, refreshing lazily on scrape
+    """
+    app = web.Application()
+    app["refresher"] = refresher
+    app.router.add_get("/", metrics_handler)
+    app.router.add_get("/metrics", metrics_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+    return runner
+
+def index_services_by_chain(solana_services):
+    """
+    Map each chain to its first configured Solana service with a URL
+    """
+    services_by_chain = {}
+    for solana in solana_services:
+        if solana.get("chain") and solana.get("url"):
+            services_by_chain.setdefault(solana["chain"], solana)
+    return services_by_chain
+
+def bind_metrics(data):
+    """
+    Pre-create Prometheus label children for configured servers, wallets and Neon transaction monitors
+    """
+    health_children = {
+        (server, server_group["group_name"]): solana_health.labels(address=server, server_group=server_group["group_name"])
+        for server_group in data.get("solana_servers", [])
+        if server_group.get("group_name")
+        for server in server_group.get("servers", [])
+    }
+    wallet_children = {
+        (wallet["value"], wallet["name"], wallet.get("chain")): solana_wallet_balance.labels(address=wallet["value"], name=wallet["name"])
+        for wallet in data.get("wallets", [])
+        if wallet.get("value") and wallet.get("name")
+    }
+    tx_children = {}
+    for solana in data.get("solana_services", []):
+        labels = {"chain": solana.get("chain"), "program_id": solana.get("program_id"), "solana_url": solana.get("url")}
+        if all(labels.values()):
+            tx_children[tuple(labels.values())] = (
+                neon_tx_count.labels(**labels),
+                neon_tx_fail_count.labels(**labels),
+                neon_tx_success_ratio.labels(**labels)
+            )
+    return health_children, wallet_children, tx_children
+
+def remove_stale_metrics(old_children, new_children, neon_services, services_by_chain):
+    """
+    Remove label children dropped by a config reload so their last values stop being exported
+    """
+    old_health, old_wallet, old_tx = old_children
+    new_health, new_wallet, new_tx = new_children
+    for labels in old_health.keys() - new_health.keys():
+        solana_health.remove(*labels)
+    # Wallet series are labelled by address and name only, shared by entries on different chains
+    wallet_labels = {(wallet_value, name) for wallet_value, name, _ in new_wallet}
+    for labels in {(wallet_value, name) for wallet_value, name, _ in old_wallet} - wallet_labels:
+        solana_wallet_balance.remove(*labels)
+    for labels in old_tx.keys() - new_tx.keys():
+        for metric in (neon_tx_count, neon_tx_fail_count, neon_tx_success_ratio):
+            metric.remove(*labels)
+    lag_labels = {
+        (neon_name, solana_name, chain)
+        for neon_name, _, solana_name, _, chain in block_lag_pairs(neon_services, services_by_chain)
+    }
+    for metric, labels in [key for key in bound_metrics if key[0] is neon_proxy_block_lag]:
+        if labels not in lag_labels:
+            metric.remove(*labels)
+            del bound_metrics[(metric, labels)]
+
+async def update_health(session, server, health_gauge):
+    health_gauge.set(await healthcheck(session, server))
+
+async def update_balances(session, wallets, services_by_chain, redis_conn, wallet_children):
+    balances = await check_balances(session, wallets, services_by_chain, redis_conn)
+    for (wallet_value, _, wallet_chain), balance_gauge in wallet_children.items():
+        if (wallet_value, wallet_chain) in balances:
+            balance_gauge.set(balances[(wallet_value, wallet_chain)])
+
+def load_config(path=CONFIG_PATH):
+    """
+    Read and parse the YAML config file
+    """
+    with open(path, "r") as yamlfile:
+        return yaml.load(yamlfile, Loader=SafeLoader) or {}
+
+def get_config_mtime(path=CONFIG_PATH):
+    """
+    Return the config file modification time, or None if it cannot be read
+    """
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+async def main():
     killer = GracefulKiller()
-    # Read config.yaml
+    config_mtime = get_config_mtime()
     try:
-        with open("config.yaml", "r") as yamlfile:
-            data = yaml.load(yamlfile, Loader=yaml.FullLoader)
-            print("Read successful", flush=True)
+        data = load_config()
+        logger.info("Read successful")
     except Exception as e:
-        print(f"Failed to read config.yaml: {e}", flush=True)
+        logger.error("Failed to read config.yaml: %s", e)
         data = {"solana_servers": [], "wallets": [], "neon_services": [], "solana_services": []}
+    health_children, wallet_children, tx_children = bind_metrics(data)
+    services_by_chain = index_services_by_chain(data.get("solana_services", []))
     # Restore counters from Redis
     restore_counters(data.get("solana_services", []), r)
-    while True:
-        try:
-            # Legacy logic
-            for server_group in data.get("solana_servers", []):
-                for server in server_group.get("servers", []):
-                    result = healthcheck(server)
-                    solana_health.labels(address=server, server_group=server_group["group_name"]).set(result)
-            for wallet in data.get("wallets", []):
-                result = check_balance(wallet, data.get("solana_services", []))
-                solana_wallet_balance.labels(address=wallet["value"], name=wallet["name"]).set(result)
-            # New logic for neon_proxy_block_lag
-            healthcheck_block_lag(data.get("neon_services", []), data.get("solana_services", []))
-            # New Neon transaction monitoring for all networks
-            monitor_neon_transactions(data.get("solana_services", []), r)
-            if killer.kill_now:
-                break
-            time.sleep(10)
-        except KeyboardInterrupt:
-            sys.exit()
-        except Exception as f:
-            print('main error: ', f)
+    async with create_session() as session:
+
+        async def refresh_gauges():
+            tasks = [update_health(session, server, health_gauge) for (server, _), health_gauge in health_children.items()]
+            tasks.append(update_balances(session, data.get("wallets", []), services_by_chain, r, wallet_children))
+            tasks.append(healthcheck_block_lag(session, data.get("neon_services", []), services_by_chain))
+            for result in await asyncio.gather(*tasks, return_exceptions=True):
+                if isinstance(result, Exception):
+                    logger.error('refresh error: %s', result)
+
+        refresher = LazyRefresher(refresh_gauges, SCRAPE_REFRESH_TTL)
+        metrics_runner = await start_metrics_server(METRICS_PORT, refresher)
+        # Neon transaction counters must see every signature, so they keep polling on a
+        # monotonic deadline that does not drift with cycle duration
+        next_deadline = time.monotonic() + POLL_INTERVAL
+        while True:
+            try:
+                mtime = get_config_mtime()
+                if mtime != config_mtime:
+                    config_mtime = mtime
+                    try:
+                        data = load_config()
+                    except Exception as e:
+                        logger.error("Failed to reload config.yaml, keeping the previous config: %s", e)
+                    else:
+                        logger.info("Reloaded config.yaml")
+                        old_children = (health_children, wallet_children, tx_children)
+                        # refresh_gauges reads these through the closure, so scrapes pick them up too
+                        health_children, wallet_children, tx_children = bind_metrics(data)
+                        services_by_chain = index_services_by_chain(data.get("solana_services", []))
+                        remove_stale_metrics(old_children, (health_children, wallet_children, tx_children),
+                                             data.get("neon_services", []), services_by_chain)
+                        # New health and balance children start at 0, so the next scrape must refresh first
+                        refresher.last_refresh = None
+                        # Counters for new label sets start at zero, so restore their persisted totals
+                        added = tx_children.keys() - old_children[2].keys()
+                        await run_blocking(restore_counters, [
+                            solana for solana in data.get("solana_services", [])
+                            if (solana.get("chain"), solana.get("program_id"), solana.get("url")) in added
+                        ], r)
+                if await monitor_neon_transactions(session, data.get("solana_services", []), r, tx_children):
+                    neon_exporter_last_update_timestamp.set(time.time())
+                if killer.kill_now:
+                    break
+            except Exception as f:
+                logger.error('main error: %s', f)
+            sleep_for = next_deadline - time.monotonic()
+            if sleep_for > 0:
+                if await killer.wait(sleep_for):
+                    break
+            elif sleep_for < -POLL_INTERVAL:
+                # Resync after a stall instead of running back-to-back catch-up cycles
+                next_deadline = time.monotonic()
+            next_deadline += POLL_INTERVAL
+        await metrics_runner.cleanup()
 
 if __name__ == '__main__':
-    start_http_server(9000)
-    main()
+    logging.basicConfig(
+        level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+        format='%(asctime)s %(levelname)s %(message)s'
+    )
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())